@@ -109,11 +109,736 @@ class ShellSession:
 shell_session = ShellSession()
 
 
+SEARCH_EXTENSIONS = (".py", ".js", ".jsx", ".css", ".html", ".json", ".md", ".txt")
+SKIP_DIRS = ("node_modules", ".git")
+TRASH_PREFIX = ".terminate-trash-"
+
+
+def iter_workspace_files(path):
+    """Yield searchable file paths under path, skipping vendored folders."""
+    for root, dirs, files in os.walk(path):
+        dirs[:] = [
+            d for d in dirs if d not in SKIP_DIRS and not d.startswith(TRASH_PREFIX)
+        ]
+        for file in files:
+            if file.endswith(SEARCH_EXTENSIONS):
+                yield os.path.join(root, file)
+
+
+def atomic_write(path, content):
+    """Write content next to path and return the temp file to os.replace later."""
+    import tempfile
+
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        try:
+            import shutil
+
+            shutil.copymode(path, tmp_path)
+        except OSError:
+            pass
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return tmp_path
+
+
+class ReplaceEngine:
+    MAX_PREVIEWS = 4
+    # Characters of line context kept on each side of a match in a hunk
+    HUNK_CONTEXT = 80
+
+    def __init__(self, workers=None):
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.previews = {}
+        self.lock = threading.Lock()
+
+    def _scan_file(self, file_path, pattern, replacement, literal):
+        # Rewriting through a link would replace it with a regular file, and
+        # the target may be edited a second time under its own path
+        if os.path.islink(file_path):
+            return None
+        try:
+            st = os.stat(file_path)
+            # newline="" keeps CRLF files intact when we write them back
+            with open(file_path, "r", encoding="utf-8", newline="") as f:
+                content = f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+        hunks = []
+        pieces = []
+        last = 0
+        line = 1
+        line_pos = 0
+        line_start = 0
+        line_end = -1
+        for m in pattern.finditer(content):
+            start = m.start()
+            newlines = content.count("\n", line_pos, start)
+            if newlines:
+                line += newlines
+                line_start = content.rfind("\n", line_pos, start) + 1
+            line_pos = start
+            rep = replacement if literal else m.expand(replacement)
+            # Line bounds are reused across matches so a long line is scanned once
+            if start > line_end:
+                line_end = content.find("\n", start)
+                if line_end == -1:
+                    line_end = len(content)
+            # Minified files are one huge line; keep only a window around the
+            # match so memory scales with matches, not matches x line length
+            ctx_start = max(line_start, start - self.HUNK_CONTEXT)
+            ctx_end = min(
+                line_end, m.end() + self.HUNK_CONTEXT, start + 3 * self.HUNK_CONTEXT
+            )
+            hunks.append(
+                {
+                    "line": line,
+                    "column": start - line_start + 1,
+                    "match": m.group(),
+                    "replacement": rep,
+                    "content": content[ctx_start:ctx_end].strip(),
+                    "truncated": ctx_start > line_start or ctx_end < line_end,
+                }
+            )
+            pieces.append(content[last:start])
+            pieces.append(rep)
+            last = m.end()
+
+        if not hunks:
+            return None
+        pieces.append(content[last:])
+        new_content = "".join(pieces)
+        if new_content == content:
+            return None
+        return {
+            "path": file_path,
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "hunks": hunks,
+            "new_content": new_content,
+        }
+
+    def preview(self, query, replacement, path, regex=False, case_sensitive=True):
+        import re
+        import uuid
+        from concurrent.futures import ThreadPoolExecutor
+
+        if not query:
+            raise ValueError("Search query must not be empty")
+        flags = 0 if case_sensitive else re.IGNORECASE
+        pattern = re.compile(query if regex else re.escape(query), flags)
+        if regex:
+            # Surface bad group references now instead of on the first match
+            pattern.sub(replacement, "")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            scanned = pool.map(
+                lambda p: self._scan_file(p, pattern, replacement, not regex),
+                iter_workspace_files(path),
+            )
+            files = sorted((r for r in scanned if r), key=lambda r: r["path"])
+
+        preview_id = uuid.uuid4().hex
+        with self.lock:
+            self.previews[preview_id] = files
+            while len(self.previews) > self.MAX_PREVIEWS:
+                self.previews.pop(next(iter(self.previews)))
+
+        return {
+            "preview_id": preview_id,
+            "total_files": len(files),
+            "total_hunks": sum(len(r["hunks"]) for r in files),
+            "files": [{"path": r["path"], "count": len(r["hunks"])} for r in files],
+        }
+
+    def _get(self, preview_id):
+        with self.lock:
+            files = self.previews.get(preview_id)
+        if files is None:
+            raise KeyError("Unknown or expired preview")
+        return files
+
+    def details(self, preview_id, file_path, offset=0, limit=100):
+        for r in self._get(preview_id):
+            if r["path"] == file_path:
+                return {
+                    "path": file_path,
+                    "total": len(r["hunks"]),
+                    "hunks": r["hunks"][offset : offset + limit],
+                }
+        raise KeyError(f"{file_path} is not part of this preview")
+
+    def discard(self, preview_id):
+        with self.lock:
+            self.previews.pop(preview_id, None)
+
+    def apply(self, preview_id, paths=None):
+        files = self._get(preview_id)
+        if paths is not None:
+            wanted = set(paths)
+            unknown = wanted - {r["path"] for r in files}
+            if unknown:
+                raise KeyError(
+                    "Not part of this preview: " + ", ".join(sorted(unknown)[:10])
+                )
+            files = [r for r in files if r["path"] in wanted]
+
+        stale = []
+        for r in files:
+            try:
+                st = os.stat(r["path"])
+            except OSError:
+                stale.append(r["path"])
+                continue
+            if st.st_mtime_ns != r["mtime_ns"] or st.st_size != r["size"]:
+                stale.append(r["path"])
+        if stale:
+            raise RuntimeError(
+                "Files changed since preview, re-run it: " + ", ".join(stale[:10])
+            )
+
+        # Stage every temp file first so a failure here leaves the tree untouched
+        staged = []
+        try:
+            for r in files:
+                staged.append((r["path"], atomic_write(r["path"], r["new_content"])))
+        except Exception:
+            for _, tmp_path in staged:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            raise
+
+        # Keep a second name for each original so the batch can be rolled back,
+        # while os.replace swaps the new content in without the path ever missing
+        import shutil
+
+        backups = []
+        replaced = []
+        try:
+            for file_path, tmp_path in staged:
+                backup = tmp_path + ".bak"
+                try:
+                    os.link(file_path, backup)
+                except OSError:
+                    shutil.copy2(file_path, backup)
+                backups.append(backup)
+                os.replace(tmp_path, file_path)
+                replaced.append((file_path, backup))
+        except Exception:
+            for file_path, backup in reversed(replaced):
+                try:
+                    os.replace(backup, file_path)
+                except OSError:
+                    pass
+            for path in [tmp_path for _, tmp_path in staged] + backups:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            raise
+
+        for backup in backups:
+            try:
+                os.remove(backup)
+            except OSError:
+                pass
+
+        applied = {r["path"] for r in files}
+        with self.lock:
+            remaining = [
+                r for r in self.previews.get(preview_id, []) if r["path"] not in applied
+            ]
+            if remaining:
+                self.previews[preview_id] = remaining
+            else:
+                self.previews.pop(preview_id, None)
+        return {
+            "files": len(files),
+            "replacements": sum(len(r["hunks"]) for r in files),
+            "remaining": len(remaining),
+        }
+
+
+replace_engine = ReplaceEngine()
+
+
+class PackageInstaller:
+    # Requests arriving within this window share one pip resolver run
+    BATCH_DELAY = 0.3
+
+    def __init__(self):
+        self.pending = []
+        self.batch = []
+        self.results = {}
+        self.process = None
+        self.thread = None
+        self.cancelled = False
+        self.out_queue = queue.Queue()
+        self.lock = threading.Lock()
+        # Signalled whenever results are written, for callers waiting on one
+        self.results_ready = threading.Condition(self.lock)
+
+    def enqueue(self, package_names):
+        with self.lock:
+            for name in package_names:
+                name = name.strip()
+                if name and name not in self.pending and name not in self.batch:
+                    self.pending.append(name)
+                    self.results.pop(name, None)
+            if self.pending and self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+            return list(self.pending)
+
+    def _pip_install(self, packages):
+        """Run one pip install and return an error string, or None on success."""
+        self.out_queue.put(f"$ pip install {' '.join(packages)}\n")
+        try:
+            # Spawn under the lock so cancel() either sees the process or
+            # is seen here before pip ever starts
+            with self.lock:
+                if self.cancelled:
+                    return "Cancelled"
+                process = self.process = subprocess.Popen(
+                    [sys.executable, "-m", "pip", "install", *packages],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    bufsize=1,
+                    env={**os.environ, "PYTHONUNBUFFERED": "1"},
+                    **get_subprocess_kwargs(),
+                )
+            for line in process.stdout:
+                self.out_queue.put(line)
+            returncode = process.wait()
+        except Exception as e:
+            return str(e)
+        finally:
+            with self.lock:
+                self.process = None
+
+        if self.cancelled:
+            return "Cancelled"
+        if returncode != 0:
+            return f"pip exited with code {returncode}"
+        return None
+
+    def _run(self):
+        import importlib
+        import time
+
+        while True:
+            time.sleep(self.BATCH_DELAY)
+            with self.lock:
+                if not self.pending:
+                    self.thread = None
+                    return
+                self.batch, self.pending = self.pending, []
+                self.cancelled = False
+                batch = list(self.batch)
+
+            error = self._pip_install(batch)
+            results = {name: error for name in batch}
+            if error and not self.cancelled and len(batch) > 1:
+                # pip resolves all-or-nothing, so one bad name (often an import
+                # name that differs from its package) would sink the rest
+                self.out_queue.put("Batch failed, installing packages one by one\n")
+                for name in batch:
+                    results[name] = self._pip_install([name])
+
+            # Let find_spec and importlib.metadata see the new site-packages
+            importlib.invalidate_caches()
+            with self.lock:
+                for name, error in results.items():
+                    self.results[name] = {"success": error is None, "error": error}
+                self.batch = []
+                self.results_ready.notify_all()
+
+    def wait_for(self, name):
+        """Block until name has a result from its batch and return it."""
+        with self.results_ready:
+            self.results_ready.wait_for(lambda: name in self.results)
+            return self.results[name]
+
+    def read(self):
+        output = []
+        try:
+            while True:
+                output.append(self.out_queue.get_nowait())
+        except queue.Empty:
+            pass
+        return "".join(output)
+
+    def status(self):
+        with self.lock:
+            if self.batch:
+                state = "installing"
+            elif self.pending:
+                state = "queued"
+            else:
+                state = "idle"
+            return {
+                "state": state,
+                "installing": list(self.batch),
+                "pending": list(self.pending),
+                "results": dict(self.results),
+            }
+
+    def cancel(self):
+        with self.lock:
+            for name in self.pending:
+                self.results[name] = {"success": False, "error": "Cancelled"}
+            self.pending.clear()
+            self.cancelled = True
+            self.results_ready.notify_all()
+            if self.process:
+                self.process.terminate()
+
+
+package_installer = PackageInstaller()
+
+
+def create_path(path, is_dir=False):
+    """Create an empty file or a directory tree."""
+    if is_dir:
+        os.makedirs(path, exist_ok=True)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            pass  # Create empty file
+
+
+# Seconds before a trash dir that failed to purge is retried; doubles per failure
+TRASH_RETRY_DELAY = 30
+trash_state = {"active": set(), "retry_at": {}, "lock": threading.Lock()}
+
+
+def purge_trash(trash):
+    """Remove a trash directory, logging anything that could not be deleted."""
+    import shutil
+    import stat
+    import time
+
+    errors = []
+
+    def onerror(func, path, exc):
+        # Read-only files (e.g. .git/objects on Windows) need +w to unlink
+        try:
+            os.chmod(path, stat.S_IWRITE)
+            func(path)
+        except Exception as e:
+            errors.append(f"{path}: {e}")
+
+    # onerror is deprecated from 3.12; both hooks ignore the exception argument
+    if sys.version_info >= (3, 12):
+        rmtree_kwargs = {"onexc": onerror}
+    else:
+        rmtree_kwargs = {"onerror": onerror}
+
+    def remove(path):
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, **rmtree_kwargs)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                onerror(os.remove, path, None)
+
+    try:
+        # Children first, so the ignore file keeps git blind to the rest
+        with os.scandir(trash) as it:
+            children = [entry.path for entry in it if entry.name != ".gitignore"]
+        for child in children:
+            remove(child)
+        shutil.rmtree(trash, **rmtree_kwargs)
+    except Exception as e:
+        errors.append(str(e))
+    finally:
+        with trash_state["lock"]:
+            trash_state["active"].discard(trash)
+            failures = trash_state["retry_at"].pop(trash, (0, 0))[0]
+            if errors:
+                # Back off so browsing the folder does not rerun a doomed rmtree
+                failures += 1
+                delay = TRASH_RETRY_DELAY * 2 ** min(failures - 1, 6)
+                trash_state["retry_at"][trash] = (failures, time.monotonic() + delay)
+    if errors:
+        # Left for a later sweep of this directory to retry
+        print(f"Failed to delete {trash}: " + "; ".join(errors[:5]))
+
+
+def purge_trash_async(trash):
+    import time
+
+    trash = os.path.abspath(trash)
+    with trash_state["lock"]:
+        if trash in trash_state["active"]:
+            return
+        retry = trash_state["retry_at"].get(trash)
+        if retry and time.monotonic() < retry[1]:
+            return
+        trash_state["active"].add(trash)
+    threading.Thread(target=purge_trash, args=(trash,), daemon=True).start()
+
+
+def sweep_trash(directory):
+    """Resume deleting trash left in directory by a crash or a failed purge."""
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.startswith(TRASH_PREFIX) and entry.is_dir():
+                    purge_trash_async(entry.path)
+    except OSError:
+        pass
+
+
+def trash_delete(path):
+    """Delete path, handing directory trees to a background thread."""
+    import uuid
+
+    if os.path.isdir(path) and not os.path.islink(path):
+        parent = os.path.dirname(os.path.abspath(path))
+        # A same-directory rename is atomic, so the tree vanishes immediately
+        trash = os.path.join(parent, TRASH_PREFIX + uuid.uuid4().hex)
+        os.rename(path, trash)
+        try:
+            # An ignore-everything file keeps git status and git add -A away
+            with open(os.path.join(trash, ".gitignore"), "w") as f:
+                f.write("*\n")
+        except OSError:
+            pass
+        purge_trash_async(trash)
+        sweep_trash(parent)
+    else:
+        os.remove(path)
+
+
+def fast_copyfile(src, dst):
+    """Copy file data in the kernel when possible, then copy metadata."""
+    import shutil
+
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    # Opening dst for writing would truncate src before a byte is read
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        copiers = []
+        if hasattr(os, "copy_file_range"):
+            # Lets reflink-capable filesystems share extents instead of copying
+            copiers.append(
+                lambda n: os.copy_file_range(fsrc.fileno(), fdst.fileno(), n)
+            )
+        if hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+            copiers.append(lambda n: os.sendfile(fdst.fileno(), fsrc.fileno(), None, n))
+
+        copied = 0
+        for copy_chunk in copiers:
+            try:
+                while copied < size:
+                    n = copy_chunk(size - copied)
+                    if n == 0:
+                        break
+                    copied += n
+                break
+            except OSError:
+                # Cross-filesystem or unsupported fd types; try the next one
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+                copied = 0
+        if copied < size:
+            fsrc.seek(copied)
+            fdst.seek(copied)
+            shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+    shutil.copystat(src, dst)
+    return dst
+
+
+FILE_OP_FIELDS = {
+    "create": ("path",),
+    "delete": ("path",),
+    "rename": ("src", "dst"),
+    "move": ("src", "dst"),
+    "copy": ("src", "dst"),
+}
+
+
+class FileOpsJobs:
+    def __init__(self):
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, ops):
+        import uuid
+
+        if not isinstance(ops, list) or not all(isinstance(op, dict) for op in ops):
+            raise ValueError("File operations must be a list of objects")
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "state": "running",
+            "total": len(ops),
+            "completed": 0,
+            "failed": 0,
+            "current": None,
+            "cancelled": False,
+            "events": queue.Queue(),
+        }
+        with self.lock:
+            self.jobs[job["id"]] = job
+        threading.Thread(target=self._run, args=(job, ops), daemon=True).start()
+        return job["id"]
+
+    def _apply(self, op):
+        import shutil
+
+        kind = op.get("op")
+        if kind not in FILE_OP_FIELDS:
+            raise ValueError(f"Unknown file operation: {kind}")
+        for field in FILE_OP_FIELDS[kind]:
+            if not op.get(field):
+                raise ValueError(f"'{kind}' operation is missing '{field}'")
+
+        if kind == "create":
+            create_path(op["path"], op.get("is_dir", False))
+        elif kind == "delete":
+            trash_delete(op["path"])
+        elif kind == "rename":
+            os.rename(op["src"], op["dst"])
+        elif kind == "move":
+            shutil.move(op["src"], op["dst"], copy_function=fast_copyfile)
+        elif kind == "copy":
+            if os.path.isdir(op["src"]):
+                shutil.copytree(op["src"], op["dst"], copy_function=fast_copyfile)
+            else:
+                fast_copyfile(op["src"], op["dst"])
+
+    def _run(self, job, ops):
+        state = "failed"
+        try:
+            for index, op in enumerate(ops):
+                if job["cancelled"]:
+                    state = "cancelled"
+                    return
+                job["current"] = op.get("path") or op.get("src")
+                event = {"index": index, "op": op.get("op"), "path": job["current"]}
+                try:
+                    self._apply(op)
+                    event["success"] = True
+                except Exception as e:
+                    job["failed"] += 1
+                    event["success"] = False
+                    event["error"] = str(e)
+                job["completed"] += 1
+                job["events"].put(event)
+            state = "done"
+        finally:
+            # Always leave running, or progress() would never retire the job
+            job["current"] = None
+            job["state"] = state
+
+    def progress(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            raise KeyError("Unknown file operation job")
+
+        events = []
+        try:
+            while True:
+                events.append(job["events"].get_nowait())
+        except queue.Empty:
+            pass
+
+        finished = job["state"] != "running"
+        if finished and job["events"].empty():
+            # Final state has been reported, nothing left to poll for
+            with self.lock:
+                self.jobs.pop(job_id, None)
+        return {
+            "job_id": job_id,
+            "state": job["state"],
+            "total": job["total"],
+            "completed": job["completed"],
+            "failed": job["failed"],
+            "current": job["current"],
+            "events": events,
+        }
+
+    def cancel(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            raise KeyError("Unknown file operation job")
+        job["cancelled"] = True
+
+
+file_ops_jobs = FileOpsJobs()
+
+
+COMPRESS_THRESHOLD = 64 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+
+def relative_to(path, root):
+    """Strip a shared root prefix from path, leaving foreign paths absolute."""
+    prefix = root.rstrip("/\\") + os.sep
+    if path.startswith(prefix):
+        return path[len(prefix) :]
+    return path
+
+
+def pack_rows(rows, columns, root=None, path_columns=("path",)):
+    """Turn a list of dicts into column arrays with root-relative paths."""
+    data = {}
+    for column in columns:
+        values = [row.get(column) for row in rows]
+        if root and column in path_columns:
+            values = [relative_to(v, root) if v else v for v in values]
+        data[column] = values
+    return {"format": "columnar", "root": root, "count": len(rows), "columns": data}
+
+
+def estimate_size(packed):
+    """Roughly size a pack_rows payload without serializing it."""
+    size = 0
+    for values in packed["columns"].values():
+        # Strings dominate; everything else is a short literal plus a comma
+        size += sum(len(v) + 3 if isinstance(v, str) else 6 for v in values)
+    return size
+
+
+def encode_payload(packed, threshold=COMPRESS_THRESHOLD):
+    """Deflate and base64 a pack_rows payload that looks larger than threshold."""
+    if estimate_size(packed) < threshold:
+        return packed
+
+    import base64
+    import json
+    import zlib
+
+    raw = json.dumps(packed, separators=(",", ":")).encode("utf-8")
+    # zlib framing so the frontend can use DecompressionStream("deflate")
+    return {
+        "format": "zlib+base64",
+        "data": base64.b64encode(zlib.compress(raw, 6)).decode("ascii"),
+    }
+
+
 def main():
     app = App()
 
     @app.expose
-    def list_dir(path="."):
+    def list_dir(path=".", compact=False):
         """List directories and files in the given path."""
         try:
             # Default to current working directory if "." is passed
@@ -124,6 +849,10 @@ def main():
             items = []
             with os.scandir(path) as it:
                 for entry in it:
+                    if entry.name.startswith(TRASH_PREFIX):
+                        # Deleted tree; resumes a purge a crash left behind
+                        purge_trash_async(entry.path)
+                        continue
                     items.append(
                         {
                             "name": entry.name,
@@ -133,6 +862,15 @@ def main():
                     )
             # Sort: directories first, then files
             items.sort(key=lambda x: (not x["is_dir"], x["name"].lower()))
+            if compact:
+                # Paths are always current_path + name, so only ship the names
+                packed = pack_rows(items, ("name", "is_dir"), root=path)
+                return {
+                    "success": True,
+                    "items": encode_payload(packed),
+                    "current_path": path,
+                    "compact": True,
+                }
             return {"success": True, "items": items, "current_path": path}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -147,6 +885,37 @@ def main():
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    @app.expose
+    def read_file_chunk(path, offset=0, size=CHUNK_SIZE, compress=False):
+        """Read a raw byte range of a file as base64."""
+        import base64
+        import zlib
+
+        try:
+            total = os.path.getsize(path)
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read(max(0, min(size, CHUNK_SIZE)))
+            encoding = "base64"
+            payload = data
+            if compress and data:
+                deflated = zlib.compress(data, 6)
+                # Already-compressed files (images, archives) only grow
+                if len(deflated) < len(data):
+                    encoding = "zlib+base64"
+                    payload = deflated
+            return {
+                "success": True,
+                "data": base64.b64encode(payload).decode("ascii"),
+                "encoding": encoding,
+                "offset": offset,
+                "length": len(data),
+                "total": total,
+                "eof": offset + len(data) >= total,
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
     @app.expose
     def save_file_content(path, content):
         """Save content to a file."""
@@ -163,11 +932,7 @@ def main():
         """Create a new file or directory."""
         print(f"create_item called: {path}, is_dir={is_dir}")
         try:
-            if is_dir:
-                os.makedirs(path, exist_ok=True)
-            else:
-                with open(path, "w", encoding="utf-8") as f:
-                    pass  # Create empty file
+            create_path(path, is_dir)
             return {"success": True}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -177,12 +942,7 @@ def main():
         """Delete a file or directory."""
         print(f"delete_item called: {path}")
         try:
-            if os.path.isdir(path):
-                import shutil
-
-                shutil.rmtree(path)
-            else:
-                os.remove(path)
+            trash_delete(path)
             return {"success": True}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -197,6 +957,33 @@ def main():
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    @app.expose
+    def file_ops_submit(ops):
+        """Start a background batch of create/rename/move/copy/delete operations."""
+        print(f"file_ops_submit called: {len(ops)} ops")
+        try:
+            return {"success": True, "job_id": file_ops_jobs.submit(ops)}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @app.expose
+    def file_ops_progress(job_id):
+        """Read progress events for a file operation job since the last call."""
+        try:
+            return {"success": True, **file_ops_jobs.progress(job_id)}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @app.expose
+    def file_ops_cancel(job_id):
+        """Stop a file operation job before its next operation."""
+        print(f"file_ops_cancel called: {job_id}")
+        try:
+            file_ops_jobs.cancel(job_id)
+            return {"success": True}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
     @app.expose
     def run_command(command, cwd=None):
         """Run a shell command."""
@@ -227,7 +1014,7 @@ def main():
             return {"success": False, "error": str(e)}
 
     @app.expose
-    def search_in_files(query, path="."):
+    def search_in_files(query, path=".", compact=False):
         """Search for a string in files."""
         print(f"search_in_files called: {query}")
         try:
@@ -235,44 +1022,86 @@ def main():
                 path = os.getcwd()
 
             results = []
-            for root, dirs, files in os.walk(path):
-                if "node_modules" in dirs:
-                    dirs.remove("node_modules")  # Skip node_modules
-                if ".git" in dirs:
-                    dirs.remove(".git")
-
-                for file in files:
-                    if file.endswith(
-                        (".py", ".js", ".jsx", ".css", ".html", ".json", ".md", ".txt")
-                    ):
-                        file_path = os.path.join(root, file)
-                        try:
-                            with open(file_path, "r", encoding="utf-8") as f:
-                                content = f.read()
-                                if query in content:
-                                    # Find line number
-                                    lines = content.split("\n")
-                                    for i, line in enumerate(lines):
-                                        if query in line:
-                                            results.append(
-                                                {
-                                                    "file": file,
-                                                    "path": file_path,
-                                                    "line": i + 1,
-                                                    "content": line.strip(),
-                                                }
-                                            )
-                                            if len(results) > 50:  # Limit results
-                                                break
-                        except:
-                            continue
+            for file_path in iter_workspace_files(path):
+                try:
+                    with open(file_path, "r", encoding="utf-8") as f:
+                        content = f.read()
+                        if query in content:
+                            # Find line number
+                            lines = content.split("\n")
+                            for i, line in enumerate(lines):
+                                if query in line:
+                                    results.append(
+                                        {
+                                            "file": os.path.basename(file_path),
+                                            "path": file_path,
+                                            "line": i + 1,
+                                            "content": line.strip(),
+                                        }
+                                    )
+                                    if len(results) > 50:  # Limit results
+                                        break
+                except:
+                    continue
                 if len(results) > 50:
                     break
 
+            if compact:
+                # "file" is the basename of "path" and can be rebuilt client side
+                packed = pack_rows(results, ("path", "line", "content"), root=path)
+                return {
+                    "success": True,
+                    "results": encode_payload(packed),
+                    "compact": True,
+                }
             return {"success": True, "results": results}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    @app.expose
+    def replace_preview(
+        query, replacement, path=".", regex=False, case_sensitive=True
+    ):
+        """Compute workspace-wide replacements without touching any file."""
+        print(f"replace_preview called: {query} -> {replacement}")
+        try:
+            if path == ".":
+                path = os.getcwd()
+            preview = replace_engine.preview(
+                query, replacement, path, regex=regex, case_sensitive=case_sensitive
+            )
+            return {"success": True, **preview}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @app.expose
+    def replace_preview_details(preview_id, path, offset=0, limit=100):
+        """Page through the hunks of one file in a replace preview."""
+        try:
+            details = replace_engine.details(preview_id, path, offset, limit)
+            return {"success": True, **details}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @app.expose
+    def replace_apply(preview_id, paths=None):
+        """Apply a replace preview to disk, all files or none."""
+        print(f"replace_apply called: {preview_id}")
+        try:
+            result = replace_engine.apply(preview_id, paths)
+            return {"success": True, **result}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @app.expose
+    def replace_discard(preview_id):
+        """Drop a replace preview that will not be applied."""
+        try:
+            replace_engine.discard(preview_id)
+            return {"success": True}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
     @app.expose
     def select_directory():
         """Open a directory selection dialog."""
@@ -324,7 +1153,7 @@ def main():
         return {"success": True, "response": response}
 
     @app.expose
-    def get_git_status(path="."):
+    def get_git_status(path=".", compact=False):
         """Get git status."""
         try:
             if path == ".":
@@ -362,8 +1191,21 @@ def main():
                     continue
                 status_code = line[:2]
                 file_path = line[3:]
+                if any(
+                    part.startswith(TRASH_PREFIX)
+                    for part in file_path.strip('"').split("/")
+                ):
+                    continue  # Directory being deleted in the background
                 changes.append({"file": file_path, "status": status_code})
 
+            if compact:
+                packed = pack_rows(changes, ("file", "status"))
+                return {
+                    "success": True,
+                    "changes": encode_payload(packed),
+                    "branch": branch,
+                    "compact": True,
+                }
             return {"success": True, "changes": changes, "branch": branch}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -555,15 +1397,43 @@ def main():
 
     @app.expose
     def install_package(package_name):
-        """Install a package using pip."""
+        """Install a package using pip, batched with any other queued installs."""
         try:
-            subprocess.check_call(
-                [sys.executable, "-m", "pip", "install", package_name],
-                **get_subprocess_kwargs(),
-            )
-            return {"success": True}
-        except subprocess.CalledProcessError as e:
+            package_name = package_name.strip()
+            if not package_name:
+                return {"success": False, "error": "Package name must not be empty"}
+            package_installer.enqueue([package_name])
+            result = package_installer.wait_for(package_name)
+            return {"success": result["success"], "error": result["error"]}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @app.expose
+    def install_packages(package_names):
+        """Queue packages for a single background pip install."""
+        print(f"install_packages called: {package_names}")
+        try:
+            pending = package_installer.enqueue(package_names)
+            return {"success": True, "pending": pending}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @app.expose
+    def install_progress():
+        """Read pip output produced since the last call plus the queue state."""
+        try:
+            output = package_installer.read()
+            return {"success": True, "output": output, **package_installer.status()}
+        except Exception as e:
             return {"success": False, "error": str(e)}
+
+    @app.expose
+    def cancel_install():
+        """Drop queued packages and stop the running pip install."""
+        print("cancel_install called")
+        try:
+            package_installer.cancel()
+            return {"success": True}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
@@ -739,6 +1609,7 @@ def main():
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    sweep_trash(os.getcwd())
     app.run()
 
 
@@ -7,7 +7,8 @@ const ImportLens = ({ activePath, onClose }) => {
     const [imports, setImports] = useState([]);
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState(null);
-    const [installing, setInstalling] = useState(null);
+    const [installing, setInstalling] = useState([]);
+    const [installLog, setInstallLog] = useState('');
     const { addToast } = useToast();
 
     const fetchImports = React.useCallback(async () => {
@@ -38,23 +39,53 @@ const ImportLens = ({ activePath, onClose }) => {
         fetchImports();
     }, [fetchImports]);
 
-    const handleInstall = async (pkgName) => {
-        setInstalling(pkgName);
+    useEffect(() => {
+        if (installing.length === 0) return;
+
+        const interval = setInterval(async () => {
+            try {
+                const res = await pytron.install_progress();
+                if (!res.success) return;
+                if (res.output) setInstallLog(prev => (prev + res.output).slice(-4000));
+                if (res.state === 'idle') {
+                    const failed = installing.filter(name => res.results[name] && !res.results[name].success);
+                    if (failed.length > 0) {
+                        addToast("Failed to install: " + failed.join(', '), { type: 'error' });
+                    }
+                    setInstalling([]);
+                    // Refresh list
+                    await fetchImports();
+                }
+            } catch (e) {
+                console.error(e);
+            }
+        }, 500);
+        return () => clearInterval(interval);
+    }, [installing, fetchImports, addToast]);
+
+    const handleInstall = async (pkgNames) => {
         try {
-            const res = await pytron.install_package(pkgName);
+            const res = await pytron.install_packages(pkgNames);
             if (res.success) {
-                // Refresh list
-                await fetchImports();
+                setInstalling(prev => [...new Set([...prev, ...pkgNames])]);
             } else {
                 addToast("Failed to install: " + res.error, { type: 'error' });
             }
         } catch (e) {
             addToast("Error: " + e, { type: 'error' });
-        } finally {
-            setInstalling(null);
         }
     };
 
+    const handleCancel = async () => {
+        try {
+            await pytron.cancel_install();
+        } catch (e) {
+            addToast("Error: " + e, { type: 'error' });
+        }
+    };
+
+    const missing = imports.filter(imp => imp.status === 'missing').map(imp => imp.name);
+
     const getStatusColor = (status) => {
         switch (status) {
             case 'installed': return '#4caf50';
@@ -91,6 +122,34 @@ const ImportLens = ({ activePath, onClose }) => {
                     </div>
                 )}
 
+                {!loading && !error && (missing.length > 1 || installing.length > 0) && (
+                    <div style={{ display: 'flex', gap: '8px', marginBottom: '12px' }}>
+                        {missing.length > 1 && (
+                            <button
+                                onClick={() => handleInstall(missing)}
+                                disabled={missing.every(name => installing.includes(name))}
+                                style={{ background: '#2d2d2d', border: '1px solid #ff6b6b', color: '#ff6b6b', padding: '4px 8px', borderRadius: '4px', cursor: 'pointer', fontSize: '11px', display: 'flex', alignItems: 'center', gap: '4px' }}
+                            >
+                                <Download size={12} /> Install all missing ({missing.length})
+                            </button>
+                        )}
+                        {installing.length > 0 && (
+                            <button
+                                onClick={handleCancel}
+                                style={{ background: '#2d2d2d', border: '1px solid #888', color: '#ccc', padding: '4px 8px', borderRadius: '4px', cursor: 'pointer', fontSize: '11px' }}
+                            >
+                                Cancel
+                            </button>
+                        )}
+                    </div>
+                )}
+
+                {installLog && (
+                    <pre style={{ background: '#111', color: '#aaa', fontSize: '11px', padding: '8px', borderRadius: '4px', maxHeight: '120px', overflowY: 'auto', whiteSpace: 'pre-wrap', marginTop: 0, marginBottom: '12px' }}>
+                        {installLog}
+                    </pre>
+                )}
+
                 {!loading && !error && imports.length > 0 && (
                     <div style={{ display: 'flex', flexDirection: 'column', gap: '8px' }}>
                         {imports.map((imp, i) => (
@@ -112,8 +171,8 @@ const ImportLens = ({ activePath, onClose }) => {
 
                                 {imp.status === 'missing' && (
                                     <button
-                                        onClick={() => handleInstall(imp.name)}
-                                        disabled={installing === imp.name}
+                                        onClick={() => handleInstall([imp.name])}
+                                        disabled={installing.includes(imp.name)}
                                         style={{
                                             background: '#2d2d2d',
                                             border: '1px solid #ff6b6b',
@@ -127,7 +186,7 @@ const ImportLens = ({ activePath, onClose }) => {
                                             gap: '4px'
                                         }}
                                     >
-                                        {installing === imp.name ? 'Installing...' : <><Download size={12} /> Install</>}
+                                        {installing.includes(imp.name) ? 'Installing...' : <><Download size={12} /> Install</>}
                                     </button>
                                 )}
 